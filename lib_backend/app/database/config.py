@@ -3,8 +3,13 @@ Database configuration module using SQLAlchemy ORM.
 
 This module sets up the database connection, session factory, and declarative base
 for defining ORM models. It uses SQLite as the backend.
+
+Optional read replicas are configured with `REPLICA_DATABASE_URLS`, a comma-separated
+list of database URLs. Reads are routed to them by `session_router.SessionRouter`.
 """
 
+import os
+import dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
@@ -18,6 +23,32 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Required for SQLite with multithreaded apps
 )
 
+# Load environment variables from .env file; this is the only place the app loads it
+dotenv.load_dotenv()
+
+# Read-only replica engines; empty when no replicas are configured
+REPLICA_DATABASE_URLS = [
+    url.strip()
+    for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",")
+    if url.strip()
+]
+
+# Seconds to wait for a network replica (e.g. Postgres) to accept a connection before
+# treating it as down; SQLite replicas are local files and don't connect over a network
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "3"))
+
+replica_engines = [
+    create_engine(
+        url,
+        connect_args=(
+            {"check_same_thread": False}
+            if url.startswith("sqlite")
+            else {"connect_timeout": REPLICA_CONNECT_TIMEOUT}
+        )
+    )
+    for url in REPLICA_DATABASE_URLS
+]
+
 # Create a configured "Session" class
 SessionLocal = sessionmaker(
     bind=engine,
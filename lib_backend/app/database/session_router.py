@@ -0,0 +1,210 @@
+"""
+Read/write session routing across a primary database and its read replicas.
+
+Writes always go to the primary engine. Read-only dependencies ask the router for
+a session and are sent to a healthy replica, chosen round-robin, unless:
+
+- no replicas are configured or all of them are unhealthy (falls back to primary), or
+- the requesting user wrote to the primary within the last `sticky_seconds`
+  (read-your-writes: the replica may not have caught up yet).
+
+Replica health is probed by reading one row from each table the read-only routes
+query (so a replica without the schema stays out of rotation), and cached for
+`health_check_interval` seconds. Probes run on a background thread, so a replica
+that is down or hanging never stalls a request; requests only read the cached
+result. A replica that fails a probe, or raises a database error while serving a
+request, is skipped until the next probe.
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from . import statements
+from ..models.user import User
+from ..models.borrowed_book import BorrowedBook
+
+
+class SessionRouter:
+    """
+    Hands out sessions bound to either the primary engine or one of the replicas.
+
+    Args:
+        primary_factory: Session factory bound to the primary (read-write) engine.
+        replica_engines: Engines for read-only replicas. May be empty.
+        sticky_seconds: How long a user's reads stay on the primary after a write.
+        health_check_interval: How long a replica health probe result is trusted.
+    """
+
+    def __init__(
+        self,
+        primary_factory: sessionmaker,
+        replica_engines: Iterable[Engine] = (),
+        sticky_seconds: float = 5.0,
+        health_check_interval: float = 10.0,
+    ):
+        self.primary_factory = primary_factory
+        self.replica_engines: List[Engine] = list(replica_engines)
+        self.sticky_seconds = sticky_seconds
+        self.health_check_interval = health_check_interval
+
+        self._replica_factories = {
+            engine: sessionmaker(bind=engine, autoflush=False, autocommit=False)
+            for engine in self.replica_engines
+        }
+        self._round_robin = itertools.cycle(self.replica_engines)
+        # Replicas join the rotation once their first probe passes
+        self._healthy: Dict[Engine, bool] = {engine: False for engine in self.replica_engines}
+        self._checked_at: Dict[Engine, float] = {engine: float("-inf") for engine in self.replica_engines}
+        self._sticky_until: Dict[int, float] = {}
+        self._probing: Set[Engine] = set()
+        self._lock = threading.Lock()
+
+        self._listen_for_writes()
+
+    def _listen_for_writes(self):
+        """
+        Registers session events on the primary factory that record which users a
+        committed transaction touched, so their next reads stick to the primary.
+        """
+        @event.listens_for(self.primary_factory, "after_flush")
+        def _collect_written_users(session: Session, flush_context):
+            written = session.info.setdefault("written_user_ids", set())
+            for obj in itertools.chain(session.new, session.dirty, session.deleted):
+                if isinstance(obj, User):
+                    written.add(obj.id)
+                elif isinstance(obj, BorrowedBook):
+                    written.update((obj.borrower_id, obj.lender_id))
+            # The user acting on the request (e.g. the lending admin) sees their own writes too
+            written.add(session.info.get("acting_user_id"))
+
+        @event.listens_for(self.primary_factory, "do_orm_execute")
+        def _collect_acting_user(orm_execute_state):
+            # Prebuilt UPDATE/INSERT statements write without flushing any objects
+            if orm_execute_state.is_update or orm_execute_state.is_insert or orm_execute_state.is_delete:
+                session = orm_execute_state.session
+                session.info.setdefault("written_user_ids", set()).add(session.info.get("acting_user_id"))
+
+        @event.listens_for(self.primary_factory, "after_commit")
+        def _mark_written_users(session: Session):
+            written = session.info.pop("written_user_ids", None)
+            if written:
+                self.mark_written(written)
+
+        @event.listens_for(self.primary_factory, "after_rollback")
+        def _discard_written_users(session: Session):
+            session.info.pop("written_user_ids", None)
+
+    def record_written(self, session: Session, user_ids: Iterable[Optional[int]]):
+        """
+        Records users whose data the session's transaction writes through statements
+        rather than objects, so their reads stick to the primary once it commits.
+        """
+        session.info.setdefault("written_user_ids", set()).update(user_ids)
+
+    def mark_written(self, user_ids: Iterable[Optional[int]]):
+        """
+        Pins the given users' reads to the primary for `sticky_seconds`.
+        """
+        until = time.monotonic() + self.sticky_seconds
+        with self._lock:
+            for user_id in user_ids:
+                if user_id is not None:
+                    self._sticky_until[user_id] = until
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        """
+        Returns True if the user wrote recently and must read from the primary.
+        """
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._sticky_until.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._sticky_until[user_id]
+                return False
+            return True
+
+    def mark_unhealthy(self, engine: Engine):
+        """
+        Takes a replica out of rotation until its next health probe.
+        """
+        if engine in self._healthy:
+            with self._lock:
+                self._healthy[engine] = False
+                self._checked_at[engine] = time.monotonic()
+
+    def _is_healthy(self, engine: Engine) -> bool:
+        """
+        Returns the cached health of a replica. Once the cached result is older than
+        `health_check_interval`, a re-probe is started in the background and the
+        previous result is used until it finishes.
+        """
+        if time.monotonic() - self._checked_at[engine] >= self.health_check_interval:
+            with self._lock:
+                start = engine not in self._probing
+                self._probing.add(engine)
+            if start:
+                threading.Thread(target=self._probe, args=(engine,), name="replica-probe", daemon=True).start()
+        return self._healthy[engine]
+
+    def _probe(self, engine: Engine):
+        """
+        Queries every table the read-only routes use on a replica and records the result.
+        """
+        try:
+            with engine.connect() as conn:
+                for probe in statements.REPLICA_PROBES:
+                    conn.execute(probe)
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._healthy[engine] = healthy
+            self._checked_at[engine] = time.monotonic()
+            self._probing.discard(engine)
+
+    def _pick_replica(self) -> Optional[Engine]:
+        """
+        Returns the next healthy replica in round-robin order, or None.
+        """
+        for _ in range(len(self.replica_engines)):
+            with self._lock:
+                engine = next(self._round_robin)
+            if self._is_healthy(engine):
+                return engine
+        return None
+
+    def write_session(self, acting_user_id: Optional[int] = None) -> Session:
+        """
+        Returns a new session bound to the primary engine.
+
+        If `acting_user_id` is given, that user's reads stick to the primary after
+        any transaction of the session that writes, along with the users it touched.
+        """
+        session = self.primary_factory()
+        if acting_user_id is not None:
+            session.info["acting_user_id"] = acting_user_id
+        return session
+
+    def read_session(self, user_id: Optional[int] = None) -> Session:
+        """
+        Returns a new session for read-only work on behalf of `user_id`.
+
+        The session is bound to a healthy replica, or to the primary when the
+        user has recently written or no replica is available.
+        """
+        if self.is_sticky(user_id):
+            return self.primary_factory()
+
+        engine = self._pick_replica()
+        if engine is None:
+            return self.primary_factory()
+        return self._replica_factories[engine]()
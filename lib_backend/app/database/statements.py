@@ -0,0 +1,179 @@
+"""
+Registry of prebuilt SQL statements for the hot request paths.
+
+Each statement is built once at import time with named bind parameters, so routes
+only supply parameter values. SQLAlchemy memoizes the cache key of these immutable
+constructs and reuses the compiled form from the engine's compiled cache, skipping
+the per-request `Query` construction and compilation work.
+
+Statements that select columns (rather than entities) return lightweight row tuples
+and are meant for routes that only read. Statements that select an entity return
+ORM instances, for routes that modify what they load.
+"""
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.book import Book
+from ..models.borrowed_book import BorrowedBook
+from ..models.loan_counter import LoanCounter
+from ..models.user import User
+
+# --- Users ---
+
+# Full ORM instance, for routes that may modify the user
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# Fields needed to authorize a request
+USER_AUTH_BY_ID = select(User.id, User.username, User.is_admin).where(User.id == bindparam("user_id"))
+
+# Fields needed to verify a login
+USER_LOGIN_BY_EMAIL = select(User.id, User.hashed_password).where(User.email == bindparam("email"))
+
+# Existence checks for signup
+USER_ID_BY_EMAIL = select(User.id).where(User.email == bindparam("email"))
+USER_ID_BY_USERNAME = select(User.id).where(User.username == bindparam("username"))
+
+# Fields returned by the admin user listing
+ALL_USERS = select(User.username, User.email, User.created_at, User.updated_at, User.is_admin)
+
+# --- Replicas ---
+
+# Health probes: one row from each table that read-only routes query, so a replica
+# that accepts connections but lacks the schema (or the tables) fails its probe
+REPLICA_PROBES = (
+    select(User.id).limit(1),
+    select(Book.id).limit(1),
+    select(BorrowedBook.id).limit(1),
+)
+
+# --- Books ---
+
+# Full ORM instance, for routes that may modify the book
+BOOK_BY_TITLE_AUTHOR = select(Book).where(
+    Book.title == bindparam("title"),
+    Book.author == bindparam("author"),
+)
+
+# Fields returned by the catalogue listing
+AVAILABLE_BOOKS = select(Book.id, Book.title, Book.author).where(Book.available_copies > 1)
+
+# Atomically takes one copy off the shelf; matches no row if none can be lent
+TAKE_BOOK_COPY = (
+    update(Book)
+    .where(Book.id == bindparam("book_id"), Book.available_copies > 1)
+    .values(available_copies=Book.available_copies - 1)
+    .execution_options(synchronize_session=False)
+)
+
+# Puts one copy back on the shelf
+RETURN_BOOK_COPY = (
+    update(Book)
+    .where(Book.id == bindparam("book_id"))
+    .values(available_copies=Book.available_copies + 1)
+    .execution_options(synchronize_session=False)
+)
+
+# --- Borrowed books ---
+
+# Full ORM instance, for routes that modify the loan
+LOAN_BY_ID = select(BorrowedBook).where(BorrowedBook.id == bindparam("loan_id"))
+
+# Atomically marks a loan returned; matches no row if it was already returned
+MARK_LOAN_RETURNED = (
+    update(BorrowedBook)
+    .where(BorrowedBook.id == bindparam("loan_id"), BorrowedBook.returned.is_not(True))
+    .values(returned=True)
+    .execution_options(synchronize_session=False)
+)
+
+# Fields returned by a user's borrowed-books listing
+BORROWED_BOOKS_BY_USER = (
+    select(
+        BorrowedBook.id,
+        Book.title,
+        Book.author,
+        BorrowedBook.lending_date,
+        BorrowedBook.return_date,
+        BorrowedBook.returned,
+    )
+    .join(Book, Book.id == BorrowedBook.book_id)
+    .where(BorrowedBook.borrower_id == bindparam("user_id"))
+)
+
+# Loans recorded after a given loan id, in id order (feeds the recommender)
+LOANS_SINCE = (
+    select(BorrowedBook.id, BorrowedBook.borrower_id, BorrowedBook.book_id)
+    .where(
+        BorrowedBook.id > bindparam("after_id"),
+        BorrowedBook.borrower_id.is_not(None),
+        BorrowedBook.book_id.is_not(None),
+    )
+    .order_by(BorrowedBook.id)
+)
+
+# Display fields of a set of books
+BOOKS_BY_IDS = select(Book.id, Book.title, Book.author).where(Book.id.in_(bindparam("book_ids", expanding=True)))
+
+# --- Loan quotas ---
+
+# Due dates of a user's loans that haven't been returned
+ACTIVE_LOAN_DUE_DATES = select(BorrowedBook.return_date).where(
+    BorrowedBook.borrower_id == bindparam("user_id"),
+    BorrowedBook.returned.is_not(True),
+)
+
+# Atomically takes a loan slot; matches no row if the user is at their limit
+TAKE_LOAN_SLOT = (
+    update(LoanCounter)
+    .where(LoanCounter.user_id == bindparam("counter_user_id"), LoanCounter.active_loans < bindparam("limit"))
+    .values(active_loans=LoanCounter.active_loans + 1)
+    .execution_options(synchronize_session=False)
+)
+
+# Gives a loan slot back
+RELEASE_LOAN_SLOT = (
+    update(LoanCounter)
+    .where(LoanCounter.user_id == bindparam("counter_user_id"), LoanCounter.active_loans > 0)
+    .values(active_loans=LoanCounter.active_loans - 1)
+    .execution_options(synchronize_session=False)
+)
+
+# Creates a user's counter row unless it already exists, keyed by dialect name
+# (ON CONFLICT DO NOTHING, so concurrent workers can't fail each other's transaction)
+INSERT_LOAN_COUNT_IF_MISSING = {
+    "sqlite": sqlite.insert(LoanCounter.__table__).on_conflict_do_nothing(index_elements=["user_id"]),
+    "postgresql": postgresql.insert(LoanCounter.__table__).on_conflict_do_nothing(index_elements=["user_id"]),
+}
+
+# Active loans of the counter's user, correlated to the loan_counters row being updated
+_ACTIVE_LOANS_OF_COUNTER = (
+    select(func.count())
+    .select_from(BorrowedBook)
+    .where(BorrowedBook.borrower_id == LoanCounter.user_id, BorrowedBook.returned.is_not(True))
+    .scalar_subquery()
+)
+
+# Locks the next batch of counter rows, in user id order, until the transaction ends,
+# so no loan or return can change them while they are recounted. SQLite has no row
+# locks (FOR UPDATE is omitted); its write lock makes the recount itself atomic.
+LOCK_LOAN_COUNTS = (
+    select(LoanCounter.user_id)
+    .where(LoanCounter.user_id > bindparam("after_user_id"))
+    .order_by(LoanCounter.user_id)
+    .limit(bindparam("batch_size"))
+    .with_for_update()
+)
+
+# Recounts the drifted counters of a locked batch from borrowed_books. The count runs
+# in a statement issued after the lock is held, so it sees every loan committed
+# against those counters (Postgres READ COMMITTED takes a snapshot per statement).
+RECOUNT_LOAN_COUNTS = (
+    update(LoanCounter)
+    .where(
+        LoanCounter.user_id > bindparam("after_user_id"),
+        LoanCounter.user_id <= bindparam("last_user_id"),
+        LoanCounter.active_loans != _ACTIVE_LOANS_OF_COUNTER,
+    )
+    .values(active_loans=_ACTIVE_LOANS_OF_COUNTER)
+    .execution_options(synchronize_session=False)
+)
@@ -1,19 +1,76 @@
-from fastapi import FastAPI
-from .database.config import engine, Base
-from .routes.auth_route import router as auth_router
-from .routes.admin_route import router as admin_router
-from .routes.user_route import router as user_router
-from .routes.book_route import router as book_router
-app = FastAPI()
-
-Base.metadata.drop_all(bind=engine)
-Base.metadata.create_all(bind=engine)
-
-@app.get("/")
+"""
+Application entry point.
+
+The app is built by `create_app()`. Importing this module is cheap: routers (and the
+dependencies they pull in) are only imported when the app is created, and the schema
+is only created when the app starts serving. `app` is still available as
+`app.main:app` for uvicorn; it is built on first access.
+"""
+
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def lifespan(app: "FastAPI"):
+    """
+    Creates any missing tables before the first request is served, and runs the
+    background jobs (recommendation index refresh, loan counter reconciliation)
+    while the app runs.
+    Set RESET_DB_ON_STARTUP=1 to drop and recreate the whole schema instead.
+    """
+    from .database.config import engine, Base
+    from .utils.utils import run_recommender, run_quota_reconciler
+
+    if os.getenv("RESET_DB_ON_STARTUP") == "1":
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    stop = threading.Event()
+    threading.Thread(target=run_recommender, args=(stop,), name="recommender", daemon=True).start()
+    threading.Thread(target=run_quota_reconciler, args=(stop,), name="quota-reconciler", daemon=True).start()
+    yield
+    stop.set()
+
+
 def home():
     return {"hello":"world"}
 
-app.include_router(auth_router, prefix="/api/auth")
-app.include_router(admin_router, prefix="/api/admin")
-app.include_router(user_router, prefix="/api/user")
-app.include_router(book_router, prefix="/api/book")
+
+def create_app() -> "FastAPI":
+    """
+    Builds the FastAPI application and registers all routers.
+    """
+    from fastapi import FastAPI
+    from .routes.auth_route import router as auth_router
+    from .routes.admin_route import router as admin_router
+    from .routes.user_route import router as user_router
+    from .routes.book_route import router as book_router
+    from .routes.recommend_route import router as recommend_router
+
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_api_route("/", home, methods=["GET"])
+    app.include_router(auth_router, prefix="/api/auth")
+    app.include_router(admin_router, prefix="/api/admin")
+    app.include_router(user_router, prefix="/api/user")
+    app.include_router(book_router, prefix="/api/book")
+    app.include_router(recommend_router, prefix="/api/recommend")
+    return app
+
+
+def __getattr__(name: str):
+    """
+    Builds `app` on first access, so `uvicorn app.main:app` keeps working without
+    paying for the routers when only `create_app` is imported.
+    """
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,5 @@
 from .user import User
 from .book import Book
-from .borrowed_book import BorrowedBook
\ No newline at end of file
+from .borrowed_book import BorrowedBook
+from .loan_counter import LoanCounter
+from .views import UserAuthView, UserView, BookView, BorrowedBookView
\ No newline at end of file
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, Boolean
 from sqlalchemy.orm import relationship
 from ..database.config import Base
-from ..utils.utils import fifteen_days_from_now
+from ..utils.dates import fifteen_days_from_now
 
 class BorrowedBook(Base):
     """
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from ..database.config import Base
+
+class LoanCounter(Base):
+    """
+    Tracks how many books a user currently has on loan.
+
+    This class defines the structure of the 'loan_counters' table. The counter is
+    updated in the same transaction as each loan and return, so borrowing quotas can
+    be enforced without counting rows in 'borrowed_books'. It is periodically
+    reconciled against 'borrowed_books' to correct any drift.
+    """
+    
+    __tablename__ = "loan_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    active_loans = Column(Integer, default=0, nullable=False)
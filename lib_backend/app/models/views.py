@@ -0,0 +1,61 @@
+"""
+Read-only views of the ORM models, for routes that only read.
+
+Each view is a `NamedTuple` (a tuple subclass with empty `__slots__`), built directly
+from a result row of the matching statement in `app.database.statements`. Unlike the
+declarative models, views carry no instance dict, relationship descriptors, or
+identity-map state, so building them is cheap and they use little memory.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, NamedTuple
+
+
+class UserAuthView(NamedTuple):
+    """
+    The fields needed to authorize a request. Built from `USER_AUTH_BY_ID` rows.
+    """
+    id: int
+    username: str
+    is_admin: bool
+
+
+class UserView(NamedTuple):
+    """
+    A user as shown in the admin user listing. Built from `ALL_USERS` rows.
+    """
+    username: str
+    email: str
+    created_at: datetime
+    updated_at: datetime
+    is_admin: bool
+
+
+class BookView(NamedTuple):
+    """
+    A book as shown in the catalogue listing. Built from `AVAILABLE_BOOKS` rows.
+    """
+    id: int
+    title: str
+    author: str
+
+
+class BorrowedBookView(NamedTuple):
+    """
+    A loan joined with its book's details. Built from `BORROWED_BOOKS_BY_USER` rows.
+    """
+    id: int
+    title: str
+    author: str
+    lending_date: datetime
+    return_date: datetime
+    returned: bool
+
+
+def to_views(view, rows: Iterable[tuple]) -> List:
+    """
+    Builds a list of `view` instances from result rows whose columns are in the
+    same order as the view's fields.
+    """
+    make = view._make
+    return [make(row) for row in rows]
@@ -1,26 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from ..utils.utils import get_db, get_token_data, get_user_by_id
-from ..models.user import User
+from ..utils.utils import get_db, get_user_db, get_read_db, get_token_data, get_user_by_id, get_user_view_by_id, quota_manager, session_router
+from ..utils.dates import fifteen_days_from_now
+from ..database import statements
+from ..models.views import UserView, to_views
 from ..models.book import Book
 from ..models.borrowed_book import BorrowedBook
 from ..schemas import book_schema
 from sqlalchemy.orm import Session
 from ..schemas.user_schema import UserOutResponse, UserData
 import os
-import dotenv
-
-dotenv.load_dotenv()
 
 router = APIRouter()
 
 @router.get("/get_all_user", response_model=UserOutResponse)
-def get_all_users(user: dict = Depends(get_token_data), db: Session = Depends(get_db)):
+def get_all_users(user: dict = Depends(get_token_data), db: Session = Depends(get_read_db)):
     """
     Retrieve a list of all users in the system. Only accessible by admin users.
     
     Args:
         user: The current user making the request.
-        db: The database session dependency.
+        db: The read-only database session dependency.
         
     Raises:
         HTTPException: If the user does not have admin privileges.
@@ -28,7 +27,7 @@ def get_all_users(user: dict = Depends(get_token_data), db: Session = Depends(ge
     Returns:
         A list of all users in the database.
     """
-    db_user = get_user_by_id(user.get("user_id"), db)  # type: ignore
+    db_user = get_user_view_by_id(user.get("user_id"), db)  # type: ignore
     
     if not db_user.is_admin:  # type: ignore
         raise HTTPException(
@@ -36,7 +35,7 @@ def get_all_users(user: dict = Depends(get_token_data), db: Session = Depends(ge
             detail="User doesn't have admin level access"
         )
         
-    all_users = db.query(User).all()
+    all_users = to_views(UserView, db.execute(statements.ALL_USERS))
     return {"users": all_users}
 
 
@@ -74,9 +73,10 @@ def create_admin(access_key: str, user_data: UserData, db: Session = Depends(get
 
 
 @router.post("/request_book")
-def request_book(req: book_schema.BookRequest, token_data: dict = Depends(get_token_data), db: Session = Depends(get_db)):
+def request_book(req: book_schema.BookRequest, token_data: dict = Depends(get_token_data), db: Session = Depends(get_user_db)):
     """
     Handle a book borrowing request. The request can only be made by admin users.
+    The borrower must exist, be within their role's loan limit, and not hold too many overdue books.
 
     Args:
         req: The book request data (includes book title, author, and user ID).
@@ -84,46 +84,51 @@ def request_book(req: book_schema.BookRequest, token_data: dict = Depends(get_to
         db: The database session dependency.
 
     Raises:
-        HTTPException: If the book is not found, or if no copies are available, or if the user lacks admin access.
+        HTTPException: If the borrower or book is not found, if no copies are available, if the borrower
+            is over their quota, or if the user lacks admin access.
 
     Returns:
         Details about the borrowed book, including expected return date.
     """
-    db_user = get_user_by_id(token_data.get("user_id"), db)  # type: ignore
+    db_user = get_user_view_by_id(token_data.get("user_id"), db)  # type: ignore
     
     if not db_user.is_admin:  # type: ignore
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Lending books requires admin level access"
         )
+    
+    borrower = get_user_view_by_id(req.user_id, db)
         
     author = req.author.strip().lower()
     title = req.title.strip().lower()
         
-    req_book = db.query(Book).filter(Book.title == title, Book.author == author).first()
+    req_book = db.execute(statements.BOOK_BY_TITLE_AUTHOR, {"title": title, "author": author}).scalar_one_or_none()
     
     if not req_book:
         raise HTTPException(status_code=404, detail="Book not found, recheck title and author")
     
-    available_copies: int = req_book.available_copies  # type: ignore
+    return_date = fifteen_days_from_now()
+    
+    # Checks the borrower's cached counters and takes a loan slot in this transaction
+    quota_manager.acquire(db, borrower, return_date)
+    
+    # Decrement in the database so concurrent requests can't lend the same copy
+    taken = db.execute(statements.TAKE_BOOK_COPY, {"book_id": req_book.id})
         
-    if available_copies <= 1: 
+    if taken.rowcount == 0:  # type: ignore
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No copies available"
         )
-        
-    available_copies -= 1  
-    
-    req_book.available_copies = available_copies  # type: ignore
-    
-    db.refresh(req_book)
     
     borrowed = BorrowedBook(
         book_id=req_book.id,
         borrower_id=req.user_id,
-        lender_id=token_data.get("user_id")  # type: ignore   
+        lender_id=token_data.get("user_id"),  # type: ignore   
+        return_date=return_date
     )
+    db.add(borrowed)
     
     db.commit()
     db.refresh(borrowed)
@@ -136,8 +141,52 @@ def request_book(req: book_schema.BookRequest, token_data: dict = Depends(get_to
     }
 
 
+@router.post("/return_book/{record_id}")
+def return_book(record_id: int, token_data: dict = Depends(get_token_data), db: Session = Depends(get_user_db)):
+    """
+    Record the return of a borrowed book. Only accessible by admin users.
+
+    Args:
+        record_id: The borrow record ID returned when the book was lent.
+        token_data: The current user's authentication data.
+        db: The database session dependency.
+
+    Raises:
+        HTTPException: If the user lacks admin access, the record is not found, or the book was already returned.
+
+    Returns:
+        A confirmation message about the returned book.
+    """
+    db_user = get_user_view_by_id(token_data.get("user_id"), db)  # type: ignore
+    
+    if not db_user.is_admin:  # type: ignore
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Returning books requires admin level access"
+        )
+    
+    borrowed = db.execute(statements.LOAN_BY_ID, {"loan_id": record_id}).scalar_one_or_none()
+    
+    if borrowed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Borrow record not found")
+    
+    # Mark it returned in the database so concurrent returns can't put the copy back twice
+    marked = db.execute(statements.MARK_LOAN_RETURNED, {"loan_id": record_id})
+    
+    if marked.rowcount == 0:  # type: ignore
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book already returned")
+    
+    session_router.record_written(db, (borrowed.borrower_id,))  # type: ignore
+    db.execute(statements.RETURN_BOOK_COPY, {"book_id": borrowed.book_id})
+    quota_manager.release(db, borrowed.borrower_id, borrowed.return_date)  # type: ignore
+    
+    db.commit()
+    
+    return {"message": f"record {record_id} marked as returned"}
+
+
 @router.put("/add_book")
-def add_books(new_books: book_schema.AddBook, token_data: dict = Depends(get_token_data), db: Session = Depends(get_db)):
+def add_books(new_books: book_schema.AddBook, token_data: dict = Depends(get_token_data), db: Session = Depends(get_user_db)):
     """
     Add new books to the inventory. Only accessible by admin users.
 
@@ -152,7 +201,7 @@ def add_books(new_books: book_schema.AddBook, token_data: dict = Depends(get_tok
     Returns:
         A confirmation message about the new books added to the inventory.
     """
-    db_user = get_user_by_id(token_data.get("user_id"), db)  # type: ignore
+    db_user = get_user_view_by_id(token_data.get("user_id"), db)  # type: ignore
     
     if not db_user.is_admin:  # type: ignore
         raise HTTPException(
@@ -163,12 +212,13 @@ def add_books(new_books: book_schema.AddBook, token_data: dict = Depends(get_tok
     author = new_books.author.strip().lower()
     title = new_books.title.strip().lower()
         
-    db_book = db.query(Book).filter(Book.author == author, Book.title == title).first()
+    db_book = db.execute(statements.BOOK_BY_TITLE_AUTHOR, {"title": title, "author": author}).scalar_one_or_none()
     
     if db_book is None:
         db_book = Book(
             title=title,
-            author=author
+            author=author,
+            available_copies=0
         )
         db.add(db_book)  # Added to the session for persistence
         
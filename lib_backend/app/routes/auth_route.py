@@ -4,6 +4,7 @@ from ..models.user import User
 from ..schemas import user_schema
 from ..utils import utils
 from ..utils.utils import get_db
+from ..database import statements
 
 router = APIRouter()
 
@@ -24,8 +25,8 @@ def user_signup(user: user_schema.UserSignup, db: Session = Depends(get_db)):
         A dictionary containing the access token and token type (bearer).
     """
     # Check if the email or username already exists
-    existing_email = db.query(User).filter(User.email == user.email).first()
-    existing_username = db.query(User).filter(User.username == user.username).first()
+    existing_email = db.execute(statements.USER_ID_BY_EMAIL, {"email": user.email}).first()
+    existing_username = db.execute(statements.USER_ID_BY_USERNAME, {"username": user.username}).first()
     
     # Raise HTTP exception if email or username exists
     if existing_email:
@@ -73,7 +74,7 @@ def user_login(user: user_schema.UserLogin, db: Session = Depends(get_db)):
         A dictionary containing the access token and token type (bearer).
     """
     # Query the user by email
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = db.execute(statements.USER_LOGIN_BY_EMAIL, {"email": user.email}).first()
     
     # If user does not exist, raise a 404 error
     if db_user is None:
@@ -97,3 +98,15 @@ def user_login(user: user_schema.UserLogin, db: Session = Depends(get_db)):
     
     # Return the access token and token type
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.get("/jwks.json")
+def jwks():
+    """
+    Publish the public keys that verify access tokens, as a JWKS document.
+    Services that only verify tokens can fetch this instead of holding a signing secret.
+
+    Returns:
+        A JWKS document with one entry per signing key id (`kid`).
+    """
+    return utils.get_key_store().jwks()
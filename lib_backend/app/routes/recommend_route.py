@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from ..utils.utils import get_token_data, get_recommender
+from ..schemas.book_schema import RecommendationResponse
+
+router = APIRouter()
+
+
+def to_response(recommender, recommendations) -> dict:
+    """
+    Attaches title and author to (book_id, score) pairs from the recommender.
+    Books whose details aren't loaded yet are left out.
+    """
+    books = []
+    for book_id, score in recommendations:
+        details = recommender.book_details(book_id)
+        if details is not None:
+            books.append({"id": book_id, "title": details[0], "author": details[1], "score": score})
+    return {"recommendations": books}
+
+
+def ready_recommender():
+    """
+    Dependency that provides the recommender once its index has been built.
+
+    Raises:
+        HTTPException: If the index is still being built after startup.
+    """
+    recommender = get_recommender()
+    if not recommender.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Recommendations are not available yet, try again shortly"
+        )
+    return recommender
+
+
+@router.get("/book/{book_id}", response_model=RecommendationResponse)
+def recommend_for_book(
+    book_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    token_data: dict = Depends(get_token_data),
+    recommender=Depends(ready_recommender),
+):
+    """
+    Recommend books that patrons who borrowed this book also borrowed.
+
+    Args:
+        book_id: The book to find recommendations for.
+        limit: Maximum number of recommendations.
+        token_data: The decoded JWT token data.
+        recommender: The recommender dependency.
+
+    Returns:
+        Recommended books, best first. Empty if no patron borrowed it along with another book.
+    """
+    return to_response(recommender, recommender.for_book(book_id, limit))
+
+
+@router.get("/user", response_model=RecommendationResponse)
+def recommend_for_user(
+    limit: int = Query(10, ge=1, le=50),
+    token_data: dict = Depends(get_token_data),
+    recommender=Depends(ready_recommender),
+):
+    """
+    Recommend books for the authenticated user, based on the books they have borrowed.
+
+    Args:
+        limit: Maximum number of recommendations.
+        token_data: The decoded JWT token data, including the user_id.
+        recommender: The recommender dependency.
+
+    Returns:
+        Recommended books the user hasn't borrowed yet, best first.
+    """
+    return to_response(recommender, recommender.for_user(token_data["user_id"], limit))
@@ -79,3 +79,29 @@ class BorrowedBookResponse(BaseModel):
 
     class Config:
         orm_mode = True  # Enables support for ORM objects
+
+
+class RecommendedBook(BaseModel):
+    """
+    Schema representing a recommended book.
+
+    Attributes:
+        id (int): Book ID.
+        title (str): Title of the book.
+        author (str): Author of the book.
+        score (float): Similarity score; higher means more often borrowed together.
+    """
+    id: int
+    title: str
+    author: str
+    score: float
+
+
+class RecommendationResponse(BaseModel):
+    """
+    Schema representing a list of recommendations.
+
+    Attributes:
+        recommendations (List[RecommendedBook]): Recommended books, best first.
+    """
+    recommendations: List[RecommendedBook]
@@ -0,0 +1,8 @@
+from datetime import datetime, timedelta
+
+def fifteen_days_from_now() -> datetime:
+    """
+    Returns the current UTC datetime plus 15 days.
+    Useful for setting book return deadlines.
+    """
+    return datetime.utcnow() + timedelta(days=15)
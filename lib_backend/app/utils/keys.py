@@ -0,0 +1,293 @@
+"""
+Asymmetric JWT signing keys, rotation, and cached verification.
+
+Tokens are signed with a private key from a local `KeyStore` and carry the key's id
+in their `kid` header. Anything that only needs to *verify* tokens (API workers,
+sidecars, edge proxies) needs just the public keys, published as a JWKS document,
+and never sees a signing secret.
+
+Keys live in a directory (JWT_KEYS_DIR, default `./keys`):
+- `<kid>.pem`      private key (signing); only needed where tokens are issued
+- `<kid>.pub.pem`  public key (verification)
+- `active`         the kid used for signing new tokens
+
+Rotation adds a new key and makes it active; older public keys stay published, so
+tokens they signed keep verifying until they are retired. Running verifiers cache
+the public keys; the app's verifier flushes its cache as soon as the key directory
+changes, so rotations and retirements take effect on the next request. Verifiers
+without access to the directory pick them up when their cache expires (`max_age`).
+
+Usage:
+    python -m app.utils.keys rotate            # add a key and make it active
+    python -m app.utils.keys retire <kid>      # stop accepting tokens signed with <kid>
+    python -m app.utils.keys jwks              # print the JWKS document
+"""
+
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, Optional, Tuple
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+# JWT algorithm names supported for signing
+ALGORITHMS = ("EdDSA", "RS256")
+
+
+class KeyStore:
+    """
+    A directory of signing keys with one active key.
+
+    Args:
+        directory: Where the key files live. Created if missing.
+        algorithm: Algorithm for newly generated keys, "EdDSA" (Ed25519) or "RS256".
+    """
+
+    def __init__(self, directory: str, algorithm: str = "EdDSA"):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+        self.directory = directory
+        self.algorithm = algorithm
+        self._signing_keys: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def active_kid(self) -> Optional[str]:
+        """
+        Returns the id of the key used for signing, or None if there is none yet.
+        """
+        try:
+            with open(self._path("active")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def rotate(self) -> str:
+        """
+        Generates a new key pair, makes it the active signing key and returns its kid.
+        """
+        if self.algorithm == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        kid = f"{time.strftime('%Y%m%d')}-{secrets.token_hex(4)}"
+        os.makedirs(self.directory, exist_ok=True)
+
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        fd = os.open(self._path(f"{kid}.pem"), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(private_pem)
+
+        with open(self._path(f"{kid}.pub.pem"), "wb") as f:
+            f.write(private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ))
+
+        # Swap the active pointer atomically so readers never see a partial file
+        tmp = self._path("active.tmp")
+        with open(tmp, "w") as f:
+            f.write(kid)
+        os.replace(tmp, self._path("active"))
+        return kid
+
+    def retire(self, kid: str):
+        """
+        Deletes a key so tokens it signed no longer verify. The active key can't be retired.
+
+        Raises:
+            ValueError: If `kid` is the active key or isn't in the store.
+        """
+        if kid == self.active_kid():
+            raise ValueError("Can't retire the active key, rotate first")
+        removed = False
+        for name in (f"{kid}.pem", f"{kid}.pub.pem"):
+            try:
+                os.remove(self._path(name))
+                removed = True
+            except FileNotFoundError:
+                pass
+        if not removed:
+            raise ValueError(f"No key {kid!r} in {self.directory}")
+        self._signing_keys.pop(kid, None)
+
+    def version(self) -> Optional[int]:
+        """
+        Returns a value that changes whenever a key is added or removed (the key
+        directory's modification time), or None if the directory doesn't exist.
+        """
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def signing_key(self) -> Tuple[str, object, str]:
+        """
+        Returns (kid, private key, algorithm) for signing new tokens, generating the
+        first key if the store is empty. Parsed private keys are cached per kid.
+        """
+        kid = self.active_kid()
+        if kid is None:
+            with self._lock:
+                kid = self.active_kid() or self.rotate()
+
+        key = self._signing_keys.get(kid)
+        if key is None:
+            with open(self._path(f"{kid}.pem"), "rb") as f:
+                key = serialization.load_pem_private_key(f.read(), password=None)
+            self._signing_keys[kid] = key
+
+        algorithm = "EdDSA" if isinstance(key, ed25519.Ed25519PrivateKey) else "RS256"
+        return kid, key, algorithm
+
+    def jwks(self) -> dict:
+        """
+        Returns the JWKS document of all public keys in the store.
+        """
+        keys = []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if not name.endswith(".pub.pem"):
+                    continue
+                with open(self._path(name), "rb") as f:
+                    public_key = serialization.load_pem_public_key(f.read())
+                if isinstance(public_key, ed25519.Ed25519PublicKey):
+                    jwk = jwt.algorithms.OKPAlgorithm.to_jwk(public_key, as_dict=True)
+                    jwk["alg"] = "EdDSA"
+                else:
+                    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(public_key, as_dict=True)
+                    jwk["alg"] = "RS256"
+                jwk["kid"] = name[: -len(".pub.pem")]
+                jwk["use"] = "sig"
+                keys.append(jwk)
+        return {"keys": keys}
+
+
+def jwks_from_url(url: str, timeout: float = 5.0) -> Callable[[], dict]:
+    """
+    Returns a JWKS source that fetches the document from `url`, for verifiers that
+    run outside the API process.
+    """
+    def fetch() -> dict:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    return fetch
+
+
+class TokenVerifier:
+    """
+    Verifies tokens against public keys from a JWKS source, caching parsed keys by kid.
+
+    The cache is refreshed when it is older than `max_age` seconds, when `version_source`
+    reports a change, or when a token names an unknown kid (at most once every
+    `min_refresh_interval` seconds, so bogus kids can't force a reload on every request).
+
+    Args:
+        jwks_source: Callable returning a JWKS document, e.g. `KeyStore.jwks` or `jwks_from_url(...)`.
+        max_age: Seconds before the cached keys are reloaded.
+        min_refresh_interval: Minimum seconds between reloads triggered by unknown kids.
+        version_source: Optional cheap callable, e.g. `KeyStore.version`, whose result
+            changes when keys are added or removed; the cache is flushed when it does.
+    """
+
+    def __init__(
+        self,
+        jwks_source: Callable[[], dict],
+        max_age: float = 300.0,
+        min_refresh_interval: float = 1.0,
+        version_source: Optional[Callable[[], object]] = None,
+    ):
+        self.jwks_source = jwks_source
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.version_source = version_source
+        self._version = version_source() if version_source is not None else None
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """
+        Reloads and parses the JWKS document, replacing the cached keys.
+        """
+        with self._lock:
+            document = self.jwks_source()
+            self._keys = {jwk["kid"]: jwt.PyJWK(jwk) for jwk in document.get("keys", []) if "kid" in jwk}
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Drops the cached keys, so the next verification reloads them (e.g. right after
+        a key is retired).
+        """
+        with self._lock:
+            self._keys = {}
+            self._loaded_at = float("-inf")
+
+    def _key_for(self, kid: str) -> jwt.PyJWK:
+        if self.version_source is not None:
+            version = self.version_source()
+            if version != self._version:
+                self._version = version
+                self.invalidate()
+        age = time.monotonic() - self._loaded_at
+        if age > self.max_age or (kid not in self._keys and age > self.min_refresh_interval):
+            self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+        return key
+
+    def verify(self, token: str) -> dict:
+        """
+        Verifies the token's signature and expiry and returns its payload.
+
+        Raises:
+            jwt.ExpiredSignatureError: If the token has expired.
+            jwt.InvalidTokenError: If the token is malformed, unsigned by a known key, or tampered with.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise jwt.InvalidTokenError("Token has no kid header")
+        key = self._key_for(kid)
+        # Only the algorithm published for this key is accepted, never the token's own claim
+        return jwt.decode(token, key.key, algorithms=[key.algorithm_name])
+
+
+def main(argv):
+    # The app's own store, configured from the environment and .env exactly as the app is
+    from .utils import get_key_store
+
+    store = get_key_store()
+    command = argv[0] if argv else ""
+    if command == "rotate":
+        print(store.rotate())
+    elif command == "retire" and len(argv) == 2:
+        try:
+            store.retire(argv[1])
+        except ValueError as error:
+            print(f"error: {error}", file=sys.stderr)
+            return 1
+    elif command == "jwks":
+        print(json.dumps(store.jwks(), indent=2))
+    else:
+        print(__doc__.split("Usage:")[1].rstrip())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
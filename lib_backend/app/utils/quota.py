@@ -0,0 +1,251 @@
+"""
+Per-user borrowing quotas, enforced without counting loans on the lending path.
+
+Each user has a role ("admin" or "user") with a limit on active loans, and may hold
+at most `max_overdue` overdue loans before further lending is refused.
+
+Two counters back the checks:
+- `loan_counters.active_loans` in the database, moved by one with an atomic
+  conditional UPDATE in the same transaction as each loan or return. It is the
+  authoritative cap, and stays correct across worker processes.
+- An in-memory cache of each user's active loan count and due dates. It answers
+  "at limit?" and "how many overdue?" without a database round trip, in time
+  bounded by the user's own limit rather than the size of `borrowed_books`.
+  Changes are applied only after the transaction commits (and dropped on rollback).
+  The cache doesn't see returns handled by other worker processes, so a refusal it
+  suggests is confirmed by reloading the user's loans before it is raised.
+
+Loans become overdue by the passage of time, not by a write, so the overdue count is
+derived from the cached due dates at check time. A background reconciliation
+recounts `borrowed_books`, corrects any drifted counters, and clears the cache so
+entries reload from the database.
+"""
+
+import bisect
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from ..database import statements
+from ..models.views import UserAuthView
+
+logger = logging.getLogger(__name__)
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    """
+    Normalizes a datetime to naive UTC, the form `fifteen_days_from_now` produces.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class _UserLoans:
+    """
+    Cached active loan count and sorted due dates of one user.
+    """
+    __slots__ = ("due_dates",)
+
+    def __init__(self, due_dates: List[datetime]):
+        self.due_dates = sorted(due_dates)
+
+    @property
+    def active(self) -> int:
+        return len(self.due_dates)
+
+    def overdue(self, now: datetime) -> int:
+        return bisect.bisect_left(self.due_dates, now)
+
+
+class QuotaManager:
+    """
+    Enforces per-role loan limits and an overdue limit using cached counters.
+
+    Args:
+        session_factory: Factory of the sessions that lend and return books; the cache
+            follows transactions committed through it.
+        limits: Maximum active loans per role ("admin", "user").
+        max_overdue: Maximum overdue loans a user may hold and still borrow.
+
+    Raises:
+        ValueError: If the session factory's database isn't one the counter upsert supports.
+    """
+
+    def __init__(self, session_factory: sessionmaker, limits: Dict[str, int], max_overdue: int = 0):
+        dialect = session_factory.kw["bind"].dialect.name
+        if dialect not in statements.INSERT_LOAN_COUNT_IF_MISSING:
+            raise ValueError(
+                f"Borrowing quotas don't support the {dialect!r} database, "
+                f"expected one of {tuple(statements.INSERT_LOAN_COUNT_IF_MISSING)}"
+            )
+        self.limits = limits
+        self.max_overdue = max_overdue
+        self._create_counter = statements.INSERT_LOAN_COUNT_IF_MISSING[dialect]
+        self._loans: Dict[int, _UserLoans] = {}
+        self._lock = threading.Lock()
+
+        @event.listens_for(session_factory, "after_commit")
+        def _apply_committed(session: Session):
+            for apply in session.info.pop("quota_changes", ()):
+                apply()
+
+        @event.listens_for(session_factory, "after_rollback")
+        def _discard_rolled_back(session: Session):
+            session.info.pop("quota_changes", None)
+
+    def limit_for(self, user: UserAuthView) -> int:
+        """
+        Returns the active loan limit for the user's role.
+        """
+        return self.limits["admin" if user.is_admin else "user"]
+
+    def _cached(self, user_id: int, db: Session) -> _UserLoans:
+        """
+        Returns the user's cached loans. On a cache miss they are loaded from the
+        database, the user's counter row is created if it is missing, and the loaded
+        entry is cached once the transaction commits.
+        """
+        loans = self._loans.get(user_id)
+        if loans is not None:
+            return loans
+
+        loans = _UserLoans([
+            _naive_utc(due) for due, in db.execute(statements.ACTIVE_LOAN_DUE_DATES, {"user_id": user_id})
+        ])
+        db.execute(self._create_counter, {"user_id": user_id, "active_loans": loans.active})
+
+        def apply():
+            with self._lock:
+                self._loans.setdefault(user_id, loans)
+
+        self._on_commit(db, apply)
+        return loans
+
+    def _on_commit(self, db: Session, apply: Callable[[], None]):
+        db.info.setdefault("quota_changes", []).append(apply)
+
+    def _refusal(self, loans: _UserLoans, limit: int) -> Optional[HTTPException]:
+        """
+        Returns the error refusing another loan to a user with these loans, or None.
+        """
+        overdue = loans.overdue(datetime.utcnow())
+        if overdue > self.max_overdue:
+            return HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"User has {overdue} overdue book(s), return them before borrowing more"
+            )
+        if loans.active >= limit:
+            return self._limit_reached(limit)
+        return None
+
+    def _limit_reached(self, limit: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"User has reached the limit of {limit} borrowed books"
+        )
+
+    def acquire(self, db: Session, user: UserAuthView, due_date: datetime):
+        """
+        Checks the user may borrow another book and takes a loan slot for it in the
+        current transaction. The cache is updated when the transaction commits.
+
+        A refusal based on the cache is confirmed against the database first, since the
+        cache doesn't see returns handled by other worker processes.
+
+        Raises:
+            HTTPException: If the user has too many overdue loans or is at their loan limit.
+        """
+        limit = self.limit_for(user)
+        loans = self._cached(user.id, db)
+        refusal = self._refusal(loans, limit)
+
+        if refusal is not None and self._loans.get(user.id) is loans:
+            with self._lock:
+                self._loans.pop(user.id, None)
+            loans = self._cached(user.id, db)
+            refusal = self._refusal(loans, limit)
+        if refusal is not None:
+            raise refusal
+
+        # The database counter is authoritative: it also sees other workers' loans
+        taken = db.execute(statements.TAKE_LOAN_SLOT, {"counter_user_id": user.id, "limit": limit})
+        if taken.rowcount == 0:  # type: ignore
+            raise self._limit_reached(limit)
+
+        due_date = _naive_utc(due_date)
+
+        def apply():
+            with self._lock:
+                cached = self._loans.get(user.id)
+                if cached is not None:
+                    bisect.insort(cached.due_dates, due_date)
+
+        self._on_commit(db, apply)
+
+    def release(self, db: Session, user_id: int, due_date: datetime):
+        """
+        Gives back the loan slot of a returned book in the current transaction.
+        The cache is updated when the transaction commits.
+        """
+        db.execute(statements.RELEASE_LOAN_SLOT, {"counter_user_id": user_id})
+        due_date = _naive_utc(due_date)
+
+        def apply():
+            with self._lock:
+                cached = self._loans.get(user_id)
+                if cached is not None:
+                    index = bisect.bisect_left(cached.due_dates, due_date)
+                    if index < len(cached.due_dates) and cached.due_dates[index] == due_date:
+                        del cached.due_dates[index]
+                    else:
+                        # Out of step with the database; reload on next use
+                        del self._loans[user_id]
+
+        self._on_commit(db, apply)
+
+    def reconcile(self, db: Session, batch_size: int = 1000):
+        """
+        Recounts active loans from `borrowed_books`, corrects drifted counters, and
+        clears the cache so entries reload from the database. Counters are locked and
+        recounted `batch_size` users per transaction, so lending to other users isn't
+        held up for the whole pass. Counter rows that are missing are created on the
+        user's next loan, with the recounted value.
+        """
+        corrected = 0
+        after_user_id = 0
+        while True:
+            user_ids = db.execute(
+                statements.LOCK_LOAN_COUNTS, {"after_user_id": after_user_id, "batch_size": batch_size}
+            ).scalars().all()
+            if not user_ids:
+                break
+            recounted = db.execute(
+                statements.RECOUNT_LOAN_COUNTS, {"after_user_id": after_user_id, "last_user_id": user_ids[-1]}
+            )
+            corrected += recounted.rowcount  # type: ignore
+            db.commit()
+            after_user_id = user_ids[-1]
+        db.commit()
+
+        if corrected:
+            logger.info("Reconciled %d loan counter(s)", corrected)
+        with self._lock:
+            self._loans.clear()
+
+    def run(self, session_factory: Callable[[], Session], stop: threading.Event, interval: float = 300.0):
+        """
+        Reconciles the counters every `interval` seconds until `stop` is set.
+        Meant for a daemon thread.
+        """
+        while not stop.wait(interval):
+            try:
+                with session_factory() as db:
+                    self.reconcile(db)
+            except Exception:
+                # Keep enforcing with the current counters; retry next interval
+                logger.exception("Loan counter reconciliation failed")
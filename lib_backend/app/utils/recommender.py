@@ -0,0 +1,228 @@
+"""
+"Patrons who borrowed this also borrowed" recommendations from co-borrowing data.
+
+Loans form a sparse binary user x book matrix B. The item-item co-occurrence matrix
+C = B.T @ B counts, for each pair of books, how many patrons borrowed both; its
+diagonal is each book's number of distinct borrowers. Neighbours are scored with
+cosine similarity, C[i, j] / sqrt(C[i, i] * C[j, j]), so popular books don't
+dominate every list.
+
+The top-K neighbours of every book are precomputed into an in-memory index, so a
+per-book lookup is a dict access and a per-user lookup merges the neighbour lists
+of the books that user borrowed.
+
+New loans are folded in incrementally by a background thread: with D the new
+(user, book) pairs, C grows by D.T @ B + B.T @ D + D.T @ D, and only the books
+whose rows changed are re-ranked. Loans are found by id, and a loan with a lower id
+can commit after one with a higher id, so each refresh re-reads a window of ids
+below the last one seen; re-read pairs are already in B and are ignored. On a longer
+interval the whole index is rebuilt from the database, which picks up anything the
+window missed and refreshes scores that drifted as popularity changed.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+from ..database import statements
+
+logger = logging.getLogger(__name__)
+
+# (book_id, score) pairs, best first
+Neighbours = List[Tuple[int, float]]
+
+
+def _resized(matrix: sparse.csr_matrix, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """
+    Returns `matrix` grown to `shape` (new rows and columns are empty).
+    """
+    if matrix.shape == shape:
+        return matrix
+    matrix = matrix.copy()
+    matrix.resize(shape)
+    return matrix
+
+
+class Recommender:
+    """
+    Item-item co-borrowing recommender with a precomputed top-K neighbour index.
+
+    Args:
+        top_k: Neighbours kept per book.
+        refresh_window: Loan ids below the last one seen that each refresh re-reads,
+            to pick up loans that committed out of id order.
+    """
+
+    def __init__(self, top_k: int = 20, refresh_window: int = 1000):
+        self.top_k = top_k
+        self.refresh_window = refresh_window
+        self.ready = False
+
+        self._loans = sparse.csr_matrix((0, 0), dtype=np.int32)  # B: users x books
+        self._cooccurrence = sparse.csr_matrix((0, 0), dtype=np.int32)  # C: books x books
+        self._neighbours: Dict[int, Neighbours] = {}
+        self._books: Dict[int, Tuple[str, str]] = {}  # book_id -> (title, author)
+        self._last_loan_id = 0
+        self._lock = threading.Lock()  # Serializes writers; readers never block
+
+    def add_loans(self, borrower_ids: np.ndarray, book_ids: np.ndarray):
+        """
+        Folds new loans into the co-occurrence matrix and re-ranks the affected books.
+        Loans of a book the borrower already had are ignored.
+        """
+        if len(book_ids) == 0:
+            return
+
+        with self._lock:
+            shape = (
+                max(self._loans.shape[0], int(borrower_ids.max()) + 1),
+                max(self._loans.shape[1], int(book_ids.max()) + 1),
+            )
+            loans = _resized(self._loans, shape)
+
+            new = sparse.csr_matrix(
+                (np.ones(len(book_ids), dtype=np.int32), (borrower_ids, book_ids)), shape=shape
+            )
+            new.data[:] = 1  # Collapse repeat loans within the batch
+            new = new - new.multiply(loans)  # Drop pairs already recorded
+            new.eliminate_zeros()
+            if new.nnz == 0:
+                return
+
+            cross = new.T @ loans
+            delta = (cross + cross.T + new.T @ new).tocsr()
+            n_books = shape[1]
+            self._cooccurrence = (_resized(self._cooccurrence, (n_books, n_books)) + delta).tocsr()
+            self._loans = (loans + new).tocsr()
+
+            self._rank(np.unique(delta.nonzero()[0]))
+
+    def _rank(self, rows: np.ndarray):
+        """
+        Recomputes the top-K neighbour lists of the given books.
+        """
+        cooccurrence = self._cooccurrence
+        popularity = cooccurrence.diagonal().astype(np.float64)
+        indptr, indices, data = cooccurrence.indptr, cooccurrence.indices, cooccurrence.data
+
+        for row in rows.tolist():
+            start, end = indptr[row], indptr[row + 1]
+            cols = indices[start:end]
+            others = cols != row
+            cols = cols[others]
+            if len(cols) == 0:
+                self._neighbours.pop(row, None)
+                continue
+
+            scores = data[start:end][others] / np.sqrt(popularity[row] * popularity[cols])
+            if len(cols) > self.top_k:
+                best = np.argpartition(scores, -self.top_k)[-self.top_k:]
+                cols, scores = cols[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            self._neighbours[row] = list(zip(cols[order].tolist(), np.round(scores[order], 4).tolist()))
+
+    def for_book(self, book_id: int, limit: int = 10) -> Neighbours:
+        """
+        Returns the books most often borrowed by patrons who borrowed `book_id`.
+        """
+        return self._neighbours.get(book_id, [])[:limit]
+
+    def for_user(self, user_id: int, limit: int = 10) -> Neighbours:
+        """
+        Returns books the user hasn't borrowed, scored by summing their similarity
+        to each book the user has borrowed.
+        """
+        loans = self._loans
+        if user_id >= loans.shape[0]:
+            return []
+        borrowed = loans.indices[loans.indptr[user_id]:loans.indptr[user_id + 1]].tolist()
+        owned = set(borrowed)
+
+        scores: Dict[int, float] = {}
+        for book_id in borrowed:
+            for neighbour, score in self._neighbours.get(book_id, ()):
+                if neighbour not in owned:
+                    scores[neighbour] = scores.get(neighbour, 0.0) + score
+
+        best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(book_id, round(score, 4)) for book_id, score in best]
+
+    def book_details(self, book_id: int) -> Optional[Tuple[str, str]]:
+        """
+        Returns the (title, author) of a book seen in the loans, if known.
+        """
+        return self._books.get(book_id)
+
+    def refresh(self, db: Session):
+        """
+        Loads loans recorded since the last refresh (re-reading `refresh_window` ids
+        below it), and the details of any new books.
+        """
+        after_id = max(0, self._last_loan_id - self.refresh_window)
+        rows = db.execute(statements.LOANS_SINCE, {"after_id": after_id}).all()
+        if rows:
+            loans = np.array(rows, dtype=np.int64)
+            self.add_loans(loans[:, 1], loans[:, 2])
+            self._last_loan_id = max(self._last_loan_id, int(loans[-1, 0]))
+
+            unknown = [book_id for book_id in np.unique(loans[:, 2]).tolist() if book_id not in self._books]
+            for start in range(0, len(unknown), 500):
+                batch = unknown[start:start + 500]
+                for book_id, title, author in db.execute(statements.BOOKS_BY_IDS, {"book_ids": batch}):
+                    self._books[book_id] = (title, author)
+        self.ready = True
+
+    def rebuild(self, db: Session):
+        """
+        Rebuilds the whole index from all loans in the database and swaps it in.
+        Lookups keep using the current index while the new one is built.
+        """
+        fresh = Recommender(self.top_k, self.refresh_window)
+        fresh.refresh(db)
+        with self._lock:
+            self._loans = fresh._loans
+            self._cooccurrence = fresh._cooccurrence
+            self._neighbours = fresh._neighbours
+            self._books = fresh._books
+            self._last_loan_id = fresh._last_loan_id
+        self.ready = True
+
+    def run(
+        self,
+        session_factory: Callable[[], Session],
+        stop: threading.Event,
+        refresh_interval: float = 30.0,
+        rebuild_interval: float = 3600.0,
+    ):
+        """
+        Refreshes the index every `refresh_interval` seconds and rebuilds it from the
+        database every `rebuild_interval` seconds, until `stop` is set. Meant for a
+        daemon thread.
+        """
+        last_rebuild = time.monotonic()
+        while not stop.is_set():
+            try:
+                with session_factory() as db:
+                    if time.monotonic() - last_rebuild >= rebuild_interval:
+                        self.rebuild(db)
+                        last_rebuild = time.monotonic()
+                    else:
+                        self.refresh(db)
+            except Exception:
+                # A failed refresh keeps serving the previous index; retry next interval
+                logger.exception("Recommender refresh failed")
+            stop.wait(refresh_interval)
+
+
+# Process-wide recommender; built once when this module is first imported
+recommender = Recommender(
+    top_k=int(os.getenv("RECOMMENDER_TOP_K", "20")),
+    refresh_window=int(os.getenv("RECOMMENDER_REFRESH_WINDOW", "1000")),
+)
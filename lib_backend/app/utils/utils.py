@@ -1,38 +1,54 @@
 import os
-import bcrypt
-import jwt
-import dotenv
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
-from ..database.config import SessionLocal
-from ..models import user
+from ..database.config import SessionLocal, replica_engines
+from ..database.session_router import SessionRouter
+from .quota import QuotaManager
+from ..database import statements
+from ..models.views import UserAuthView
+from .dates import fifteen_days_from_now
 
-# Load environment variables from .env file
-dotenv.load_dotenv()
+# Environment variables from .env are loaded once, by database.config.
+# bcrypt, PyJWT, the key store and the recommender are imported inside the functions
+# that use them, to keep app startup fast.
 
 # OAuth2 schema for retrieving token from requests
 oauth_schema = OAuth2PasswordBearer(tokenUrl=str(os.getenv("TOKEN_URL")))
 
+# Routes read-only sessions to replicas and everything else to the primary
+session_router = SessionRouter(
+    SessionLocal,
+    replica_engines,
+    sticky_seconds=float(os.getenv("REPLICA_STICKY_SECONDS", "5")),
+    health_check_interval=float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10")),
+)
+
+# Per-role borrowing limits, enforced on every loan
+quota_manager = QuotaManager(
+    SessionLocal,
+    limits={
+        "user": int(os.getenv("LOAN_LIMIT_USER", "5")),
+        "admin": int(os.getenv("LOAN_LIMIT_ADMIN", "10")),
+    },
+    max_overdue=int(os.getenv("LOAN_MAX_OVERDUE", "0")),
+)
+
 def get_db():
     """
     Dependency that provides a database session.
     Ensures that the session is closed after use.
     """
-    db = SessionLocal()
+    db = session_router.write_session()
     try:
         yield db
     finally:
         db.close()
 
-def fifteen_days_from_now() -> datetime:
-    """
-    Returns the current UTC datetime plus 15 days.
-    Useful for setting book return deadlines.
-    """
-    return datetime.utcnow() + timedelta(days=15)
-
 def get_user_by_id(user_id: int, db: Session):
     """
     Retrieves a user object from the database based on the provided user ID.
@@ -41,13 +57,83 @@ def get_user_by_id(user_id: int, db: Session):
         HTTPException: If the user is not found.
 
     Returns:
-        user.User: The user instance.
+        User: The user instance.
     """
-    db_user = db.query(user.User).filter(user.User.id == user_id).first()
+    db_user = db.execute(statements.USER_BY_ID, {"user_id": user_id}).scalar_one_or_none()
     if db_user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return db_user
 
+def get_user_view_by_id(user_id: int, db: Session):
+    """
+    Retrieves the fields needed to authorize a request (id, username, is_admin)
+    for the provided user ID, as a read-only view.
+
+    Raises:
+        HTTPException: If the user is not found.
+
+    Returns:
+        UserAuthView: The user's id, username and is_admin flag.
+    """
+    row = db.execute(statements.USER_AUTH_BY_ID, {"user_id": user_id}).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return UserAuthView._make(row)
+
+@lru_cache(maxsize=None)
+def get_key_store():
+    """
+    Returns the JWT signing key store, configured by JWT_KEYS_DIR and JWT_ALGORITHM.
+    """
+    from .keys import KeyStore
+
+    return KeyStore(os.getenv("JWT_KEYS_DIR", "keys"), os.getenv("JWT_ALGORITHM", "EdDSA"))
+
+@lru_cache(maxsize=None)
+def get_token_verifier():
+    """
+    Returns the JWT verifier, which caches the key store's parsed public keys until
+    keys are added or removed, or for at most JWT_KEYS_MAX_AGE seconds.
+    """
+    from .keys import TokenVerifier
+
+    store = get_key_store()
+    return TokenVerifier(
+        store.jwks,
+        max_age=float(os.getenv("JWT_KEYS_MAX_AGE", "300")),
+        version_source=store.version,
+    )
+
+def get_recommender():
+    """
+    Returns the process-wide co-borrowing recommender (importing NumPy/SciPy on first use).
+    """
+    from .recommender import recommender
+
+    return recommender
+
+def run_recommender(stop: threading.Event):
+    """
+    Keeps the recommender's index up to date until `stop` is set. Loans are read
+    from the primary: a lagging replica could expose them out of order.
+    """
+    get_recommender().run(
+        session_router.write_session,
+        stop,
+        refresh_interval=float(os.getenv("RECOMMENDER_REFRESH_INTERVAL", "30")),
+        rebuild_interval=float(os.getenv("RECOMMENDER_REBUILD_INTERVAL", "3600")),
+    )
+
+def run_quota_reconciler(stop: threading.Event):
+    """
+    Reconciles the loan counters with `borrowed_books` until `stop` is set.
+    """
+    quota_manager.run(
+        session_router.write_session,
+        stop,
+        interval=float(os.getenv("LOAN_RECONCILE_INTERVAL", "300")),
+    )
+
 def get_token_data(token: str = Depends(oauth_schema)) -> dict:
     """
     Decodes and validates a JWT access token.
@@ -58,10 +144,10 @@ def get_token_data(token: str = Depends(oauth_schema)) -> dict:
     Returns:
         dict: Payload data from the token.
     """
+    import jwt
+
     try:
-        SECRET_KEY = os.getenv("JWT_SECRET")
-        ALGORITHM = str(os.getenv("ALOGRITHM"))  # Note: should be "ALGORITHM"
-        payload: dict = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload: dict = get_token_verifier().verify(token)
         if payload.get("user_id") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,6 +168,34 @@ def get_token_data(token: str = Depends(oauth_schema)) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def get_user_db(token_data: dict = Depends(get_token_data)):
+    """
+    Dependency that provides a database session for writes made by the authenticated user.
+    After the session commits a write, the user's own reads stick to the primary.
+    Ensures that the session is closed after use.
+    """
+    db = session_router.write_session(token_data.get("user_id"))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(token_data: dict = Depends(get_token_data)):
+    """
+    Dependency that provides a read-only database session.
+    The session is bound to a read replica unless the user wrote recently or no
+    healthy replica is available, in which case the primary is used.
+    A replica that raises a database error is taken out of rotation.
+    """
+    db = session_router.read_session(token_data.get("user_id"))
+    try:
+        yield db
+    except DBAPIError:
+        session_router.mark_unhealthy(db.get_bind())  # type: ignore
+        raise
+    finally:
+        db.close()
+
 def hash_password(password: str) -> str:
     """
     Hashes a plaintext password using bcrypt.
@@ -92,6 +206,8 @@ def hash_password(password: str) -> str:
     Returns:
         str: Hashed password.
     """
+    import bcrypt
+
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt(10)).decode()
 
 def match_password(password: str, hashed_password: str) -> bool:
@@ -105,11 +221,14 @@ def match_password(password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if matched, False otherwise.
     """
+    import bcrypt
+
     return bcrypt.checkpw(password.encode(), hashed_password.encode())
 
 def create_jwt(data: dict, expires_in: int = 7) -> str:
     """
-    Generates a JWT token with an expiration.
+    Generates a JWT token with an expiration, signed with the active key
+    and carrying its id in the `kid` header.
 
     Args:
         data (dict): Payload data to encode into the token.
@@ -118,9 +237,12 @@ def create_jwt(data: dict, expires_in: int = 7) -> str:
     Returns:
         str: Encoded JWT token.
     """
+    import jwt
+
     payload = data.copy()
     payload["exp"] = datetime.utcnow() + timedelta(hours=expires_in)
-    return jwt.encode(payload, os.getenv("JWT_SECRET"), algorithm=os.getenv("ALOGRITHM"))
+    kid, key, algorithm = get_key_store().signing_key()
+    return jwt.encode(payload, key, algorithm=algorithm, headers={"kid": kid})
 
 def decode_jwt(token: str) -> dict:
     """
@@ -132,9 +254,10 @@ def decode_jwt(token: str) -> dict:
     Returns:
         dict: Decoded payload data.
     """
+    import jwt
+
     try:
-        ALGORITHM = str(os.getenv("ALOGRITHM"))
-        payload = jwt.decode(token, os.getenv("JWT_SECRET"), algorithms=[ALGORITHM])
+        payload = get_token_verifier().verify(token)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
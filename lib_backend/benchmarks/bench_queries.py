@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: per-query overhead of ORM `Query` objects vs prebuilt statements.
+
+Seeds an in-memory SQLite database and times each hot query as the routes used to
+build it (`db.query(...)`) against its counterpart in `app.database.statements`.
+
+Usage (from lib_backend/):
+    python benchmarks/bench_queries.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.config import Base
+from app.database import statements
+from app.models import User, Book, BorrowedBook
+
+USERS = 100
+BOOKS = 200
+LOANS_PER_USER = 5
+
+
+def seed(db):
+    """
+    Fills the database with users, books and loans.
+    """
+    db.add_all(
+        User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x")
+        for i in range(1, USERS + 1)
+    )
+    db.add_all(
+        Book(title=f"title {i}", author=f"author {i % 20}", available_copies=i % 5)
+        for i in range(1, BOOKS + 1)
+    )
+    db.add_all(
+        BorrowedBook(book_id=(u * 7 + n) % BOOKS + 1, borrower_id=u, lender_id=1)
+        for u in range(1, USERS + 1)
+        for n in range(LOANS_PER_USER)
+    )
+    db.commit()
+
+
+def main(iterations: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+    seed(db)
+
+    cases = {
+        "user by id": (
+            lambda: db.query(User).filter(User.id == 42).first(),
+            lambda: db.execute(statements.USER_AUTH_BY_ID, {"user_id": 42}).first(),
+        ),
+        "book by title/author": (
+            lambda: db.query(Book).filter(Book.title == "title 42", Book.author == "author 2").first(),
+            lambda: db.execute(statements.BOOK_BY_TITLE_AUTHOR, {"title": "title 42", "author": "author 2"}).scalar_one_or_none(),
+        ),
+        "available books": (
+            lambda: db.query(Book).filter(Book.available_copies > 1).all(),
+            lambda: db.execute(statements.AVAILABLE_BOOKS).all(),
+        ),
+        "borrowed books": (
+            lambda: db.query(BorrowedBook, Book)
+            .join(Book, Book.id == BorrowedBook.book_id)
+            .filter(BorrowedBook.borrower_id == 42)
+            .all(),
+            lambda: db.execute(statements.BORROWED_BOOKS_BY_USER, {"user_id": 42}).all(),
+        ),
+    }
+
+    print(f"{'query':<22}{'orm query (us)':>16}{'statement (us)':>16}{'speedup':>10}")
+    for name, (orm_query, statement) in cases.items():
+        # Expire the identity map between runs so ORM hydration is measured, as in a fresh request
+        before = min(timeit.repeat(lambda: (orm_query(), db.expunge_all()), number=iterations, repeat=3))
+        after = min(timeit.repeat(lambda: (statement(), db.expunge_all()), number=iterations, repeat=3))
+        before_us = before / iterations * 1e6
+        after_us = after / iterations * 1e6
+        print(f"{name:<22}{before_us:>16.1f}{after_us:>16.1f}{before_us / after_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
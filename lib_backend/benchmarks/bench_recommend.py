@@ -0,0 +1,94 @@
+"""
+Benchmark: recommender index rebuild, incremental refresh and lookup latency.
+
+Seeds an in-memory SQLite database with synthetic loans (borrowers pick books with a
+skewed, Zipf-like popularity) and drives the recommender through the same calls the
+background thread makes: `rebuild()` (startup and every RECOMMENDER_REBUILD_INTERVAL)
+and `refresh()` after a further batch of loans. Then times per-book and per-user
+lookups against the in-memory index.
+
+Usage (from lib_backend/):
+    python benchmarks/bench_recommend.py [loans]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.database.config import Base
+from app.models.book import Book
+from app.models.borrowed_book import BorrowedBook
+from app.utils.recommender import Recommender
+
+USERS = 100_000
+BOOKS = 50_000
+INCREMENT = 10_000
+LOOKUPS = 20_000
+
+
+def synthetic_loans(rng: np.random.Generator, count: int):
+    """
+    Returns (borrower_ids, book_ids) for `count` loans with skewed book popularity.
+    """
+    weights = 1.0 / np.arange(1, BOOKS + 1) ** 0.8
+    books = rng.choice(np.arange(1, BOOKS + 1), size=count, p=weights / weights.sum())
+    borrowers = rng.integers(1, USERS + 1, size=count)
+    return borrowers, books
+
+
+def percentiles(samples_us):
+    p50, p99 = np.percentile(samples_us, [50, 99])
+    return f"p50 {p50:8.1f} us   p99 {p99:8.1f} us   max {max(samples_us):8.1f} us"
+
+
+def seed_loans(db: Session, borrowers: np.ndarray, books: np.ndarray):
+    """
+    Inserts one loan per (borrower, book) pair.
+    """
+    rows = [{"borrower_id": u, "book_id": b} for u, b in zip(borrowers.tolist(), books.tolist())]
+    for start in range(0, len(rows), 50_000):
+        db.execute(insert(BorrowedBook), rows[start:start + 50_000])
+    db.commit()
+
+
+def main(loans: int):
+    rng = np.random.default_rng(42)
+    recommender = Recommender(top_k=20)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(Book), [
+            {"id": book_id, "title": f"title {book_id}", "author": "author"} for book_id in range(1, BOOKS + 1)
+        ])
+        seed_loans(db, *synthetic_loans(rng, loans))
+
+        start = time.perf_counter()
+        recommender.rebuild(db)
+        print(f"rebuild from {loans:,} loans: {time.perf_counter() - start:8.2f} s "
+              f"({recommender._cooccurrence.nnz:,} co-occurrence entries)")
+
+        seed_loans(db, *synthetic_loans(rng, INCREMENT))
+        start = time.perf_counter()
+        recommender.refresh(db)
+        print(f"refresh with {INCREMENT:,} new loans: {time.perf_counter() - start:8.2f} s")
+
+    for name, lookup, ids in (
+        ("per-book", recommender.for_book, rng.integers(1, BOOKS + 1, size=LOOKUPS)),
+        ("per-user", recommender.for_user, rng.integers(1, USERS + 1, size=LOOKUPS)),
+    ):
+        samples = []
+        for item_id in ids.tolist():
+            t = time.perf_counter()
+            lookup(item_id, 10)
+            samples.append((time.perf_counter() - t) * 1e6)
+        print(f"{name} lookup: {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
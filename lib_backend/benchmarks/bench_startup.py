@@ -0,0 +1,170 @@
+"""
+Startup-time benchmark: how long a fresh process takes to become ready.
+
+Each measurement runs in a fresh interpreter, in a temporary directory (so the
+SQLite database starts empty), and reports the median of several runs:
+
+- import:       `import app.main`
+- create_app:   import + `create_app()` (all routers registered)
+- ready:        import + `create_app()` + startup (schema creation) + first `GET /`,
+                driven in-process through the ASGI interface
+- uvicorn:      wall time from spawning `uvicorn app.main:app` to the first
+                successful `GET /`, including interpreter and uvicorn startup
+- python:       bare interpreter startup, for reference
+
+The target applies to `ready`. Results are committed to `startup_results.json` with
+`--record` so regressions show up in review.
+
+Usage (from lib_backend/):
+    python benchmarks/bench_startup.py [--runs N] [--record]
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "startup_results.json")
+TARGET_READY_MS = 200
+
+ENV = {
+    "JWT_KEYS_DIR": "keys",
+    "TOKEN_URL": "api/auth/login",
+    "PYTHONPATH": BACKEND_DIR,
+}
+
+# Each probe prints the elapsed milliseconds of the stage it measures
+PROBES = {
+    "import": """
+import time
+start = time.perf_counter()
+import app.main
+print((time.perf_counter() - start) * 1e3)
+""",
+    "create_app": """
+import time
+start = time.perf_counter()
+from app.main import create_app
+create_app()
+print((time.perf_counter() - start) * 1e3)
+""",
+    "ready": """
+import time
+start = time.perf_counter()
+import asyncio
+from app.main import create_app
+
+async def first_response(app):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+             "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async with app.router.lifespan_context(app):
+        await app(scope, receive, send)
+    assert messages[0]["status"] == 200, messages
+
+asyncio.run(first_response(create_app()))
+print((time.perf_counter() - start) * 1e3)
+""",
+    "python": """
+print(0)
+""",
+}
+
+
+def run_probe(code: str) -> float:
+    """
+    Runs a probe in a fresh interpreter and returns the milliseconds it reports
+    (or, for the bare interpreter probe, the wall time of the whole process).
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=cwd, env={**os.environ, **ENV}, capture_output=True, text=True, check=True,
+        )
+        wall_ms = (time.perf_counter() - start) * 1e3
+    reported = float(out.stdout.strip().splitlines()[-1])
+    return reported or wall_ms
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn() -> float:
+    """
+    Returns the milliseconds from spawning uvicorn to its first successful response.
+    """
+    port = free_port()
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=cwd, env={**os.environ, **ENV}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                        if response.status == 200:
+                            return (time.perf_counter() - start) * 1e3
+                except OSError:
+                    if server.poll() is not None:
+                        raise RuntimeError("uvicorn exited before serving a request")
+                    time.sleep(0.005)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="runs per measurement (median is reported)")
+    parser.add_argument("--record", action="store_true", help=f"write results to {os.path.basename(RESULTS_FILE)}")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in PROBES.items():
+        results[name] = statistics.median(run_probe(code) for _ in range(args.runs))
+    results["uvicorn"] = statistics.median(run_uvicorn() for _ in range(args.runs))
+
+    for name, ms in results.items():
+        print(f"{name:<12}{ms:>10.1f} ms")
+    ready = results["ready"]
+    verdict = "within" if ready <= TARGET_READY_MS else "over"
+    print(f"ready is {verdict} the {TARGET_READY_MS} ms target")
+
+    if args.record:
+        with open(RESULTS_FILE, "w") as f:
+            json.dump({
+                "target_ready_ms": TARGET_READY_MS,
+                "runs": args.runs,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "median_ms": {name: round(ms, 1) for name, ms in results.items()},
+            }, f, indent=2)
+            f.write("\n")
+
+    return 0 if ready <= TARGET_READY_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark: ORM hydration vs slotted read views for large result sets.
+
+Seeds an in-memory SQLite database with ROWS users, books and loans, then loads each
+listing both as full declarative instances (`db.query(...).all()`) and as the
+`NamedTuple` views in `app.models.views` built from prebuilt statement rows.
+Reports wall time and peak Python memory (tracemalloc) for each.
+
+Usage (from lib_backend/):
+    python benchmarks/bench_views.py [rows]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.config import Base
+from app.database import statements
+from app.models import User, Book, BorrowedBook
+from app.models.views import UserView, BookView, BorrowedBookView, to_views
+
+
+def seed(db, rows: int):
+    """
+    Bulk-inserts `rows` users, books (all lendable) and loans for user 1.
+    """
+    db.execute(insert(User), [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(Book), [
+        {"title": f"title {i}", "author": f"author {i % 500}", "available_copies": 5}
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(BorrowedBook), [
+        {"book_id": i, "borrower_id": 1, "lender_id": 2}
+        for i in range(1, rows + 1)
+    ])
+    db.commit()
+
+
+def measure(Session, load):
+    """
+    Returns (seconds, peak bytes, row count) for `load`, each run in a fresh session
+    (as in a request, so the identity map starts empty). Time and memory are measured
+    in separate runs because tracemalloc slows allocation-heavy code.
+    """
+    with Session() as db:
+        gc.collect()
+        start = time.perf_counter()
+        count = len(load(db))
+        elapsed = time.perf_counter() - start
+
+    with Session() as db:
+        gc.collect()
+        tracemalloc.start()
+        result = load(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+    return elapsed, peak, count
+
+
+def main(rows: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    with Session() as db:
+        seed(db, rows)
+
+    cases = {
+        "users": (
+            lambda db: db.query(User).all(),
+            lambda db: to_views(UserView, db.execute(statements.ALL_USERS)),
+        ),
+        "available books": (
+            lambda db: db.query(Book).filter(Book.available_copies > 1).all(),
+            lambda db: to_views(BookView, db.execute(statements.AVAILABLE_BOOKS)),
+        ),
+        "borrowed books": (
+            lambda db: db.query(BorrowedBook, Book)
+            .join(Book, Book.id == BorrowedBook.book_id)
+            .filter(BorrowedBook.borrower_id == 1)
+            .all(),
+            lambda db: to_views(BorrowedBookView, db.execute(statements.BORROWED_BOOKS_BY_USER, {"user_id": 1})),
+        ),
+    }
+
+    print(f"{rows} rows per listing")
+    print(f"{'listing':<18}{'loader':<8}{'time (ms)':>12}{'rows/s':>14}{'peak (MB)':>12}")
+    for name, loaders in cases.items():
+        for label, load in zip(("orm", "views"), loaders):
+            elapsed, peak, count = measure(Session, load)
+            print(f"{name:<18}{label:<8}{elapsed * 1e3:>12.1f}{count / elapsed:>14,.0f}{peak / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)